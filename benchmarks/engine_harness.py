@@ -0,0 +1,595 @@
+"""
+Equivalence and speed harness for alternative data-processing engines
+
+Runs the reference functions in utils.data_processor (and
+enrich_sales_data) next to every registered alternative implementation
+on generated datasets, checks that the outputs are equivalent (exactly,
+within float tolerance, or within the reported confidence intervals for
+approximate engines), checks the peak memory of engines that promise a
+budget, and appends speedup ratios and peak memory to a JSON-lines
+history file (git-ignored).
+
+Usage:
+    python benchmarks/engine_harness.py [--rows 10000 100000] [--seed 7]
+                                        [--repeat 3] [--only customer_analysis]
+                                        [--history benchmarks/engine_history.jsonl]
+
+Exits with status 1 if any alternative disagrees with its reference or
+exceeds its memory budget.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import data_processor as dp  # noqa: E402
+
+DEFAULT_HISTORY = os.path.join(ROOT, "benchmarks", "engine_history.jsonl")
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+PRODUCTS = [
+    ("P101", "Laptop"), ("P102", "Mouse,Wireless"), ("P103", "Keyboard"),
+    ("P104", "Monitor"), ("P105", "Webcam"), ("P106", "Headphones"),
+    ("P107", "USB Cable"), ("P108", "External Hard Drive"), ("P109", "Wireless Mouse"),
+    ("P110", "Laptop Charger"),
+]
+REGIONS = ["North", "South", "East", "West"]
+# Skewed so stratified sampling has a small stratum to get right
+REGION_WEIGHTS = [0.55, 0.30, 0.13, 0.02]
+
+SHARDS = 8
+# External engines are given this budget so the spill path is what gets
+# measured; their peak may exceed it by MEMORY_SLACK (result objects and
+# estimate error) before the harness fails them
+EXTERNAL_BUDGET = 1024 * 1024
+MEMORY_SLACK = 512 * 1024
+# Approximate mode samples this share of the rows: well below the row
+# count, but enough rows per customer for the top-customer check to mean
+# something
+APPROX_SAMPLE_FRACTION = 0.2
+
+# Approximate intervals must also be informative: the median interval
+# half-width of each group, relative to the exact value, may not exceed
+# these bounds (set for the 10,000-row dataset; larger samples are tighter)
+MAX_HALF_WIDTH = {
+    "total_revenue": 0.10,
+    "regions": 0.50,
+    "products": 0.50,
+    "customers": 1.00,
+    "uniques": 0.10,
+}
+# The reported top products / customers must be real heavy hitters: at
+# least MIN_TOP_K_RECALL of them must be worth at least
+# 1 - TOP_K_TIE_TOLERANCE of the exact k-th largest value. Products are
+# near-ties and customers below the top few differ by less than their
+# sampling error, so the exact order cannot be recovered from a sample.
+MIN_TOP_K_RECALL = 0.6
+TOP_K_TIE_TOLERANCE = 0.5
+
+
+# =========================================================
+# DATASET GENERATION
+# =========================================================
+
+def generate_raw_lines(rows, seed=7):
+    """
+    Generates messy sales lines in the format of data/sales_data.txt:
+    thousands separators, commas in product names and ~10% invalid rows
+    """
+    rng = random.Random(seed)
+    customers = max(rows // 20, 10)
+    lines = []
+
+    for i in range(rows):
+        pid, name = rng.choice(PRODUCTS)
+        # A long tail of product variants so product tables are not tiny
+        if rng.random() < 0.5:
+            name = f"{name} v{rng.randint(1, rows // 100 + 1)}"
+        quantity = rng.randint(1, 10)
+        price = rng.randint(100, 50000)
+        price_text = f"{price:,}" if rng.random() < 0.3 else str(price)
+        tid = f"T{i:07d}"
+        # Heavy-tailed spend (the top customer has ~1/sqrt(customers) of
+        # the rows) without any one customer dominating the dataset
+        cid = f"C{int(customers * rng.random() ** 2):05d}"
+        region = rng.choices(REGIONS, weights=REGION_WEIGHTS)[0]
+        date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+        defect = rng.random()
+        if defect < 0.02:
+            quantity = 0
+        elif defect < 0.04:
+            cid = ""
+        elif defect < 0.06:
+            region = ""
+        elif defect < 0.08:
+            tid = "X" + tid[1:]
+        elif defect < 0.10:
+            lines.append(f"{tid}|{date}|{pid}|{name}|{quantity}")
+            continue
+
+        lines.append(f"{tid}|{date}|{pid}|{name}|{quantity}|{price_text}|{cid}|{region}")
+
+    return lines
+
+
+def synthetic_product_mapping():
+    """
+    Offline stand-in for the DummyJSON product catalogue
+    """
+    return {
+        pid: {"title": f"Product {pid}", "category": "category", "brand": "brand", "rating": 4.5}
+        for pid in range(1, 101)
+    }
+
+
+# =========================================================
+# COMPARISON HELPERS
+# =========================================================
+
+def equivalent(expected, actual, rel_tol=1e-9, abs_tol=0.01):
+    """
+    Structural equality with float tolerance; dict and list order matter
+    """
+    if isinstance(expected, float) or isinstance(actual, float):
+        if not isinstance(expected, (int, float)) or not isinstance(actual, (int, float)):
+            return False
+        return math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=abs_tol)
+
+    if isinstance(expected, dict):
+        return (
+            isinstance(actual, dict)
+            and list(expected) == list(actual)
+            and all(equivalent(expected[k], actual[k], rel_tol, abs_tol) for k in expected)
+        )
+
+    if isinstance(expected, (list, tuple)):
+        return (
+            isinstance(actual, (list, tuple))
+            and len(expected) == len(actual)
+            and all(equivalent(e, a, rel_tol, abs_tol) for e, a in zip(expected, actual))
+        )
+
+    return expected == actual
+
+
+def check_exact(expected, actual):
+    if equivalent(expected, actual):
+        return True, ""
+    return False, "outputs differ"
+
+
+def _half_width(low, high, exact):
+    return (high - low) / 2 / max(abs(exact), 1)
+
+
+def _top_k_recall(reported, exact_values):
+    """
+    Share of the reported keys whose exact value is within
+    TOP_K_TIE_TOLERANCE of the exact k-th largest value
+    """
+    if not reported:
+        return 0.0
+    ranked = sorted(exact_values.values(), reverse=True)
+    kth = ranked[min(len(reported), len(ranked)) - 1] if ranked else 0
+    floor = kth * (1 - TOP_K_TIE_TOLERANCE)
+    hits = sum(1 for key in reported if exact_values.get(key, 0) >= floor)
+    return hits / len(reported)
+
+
+def check_approximate(expected, approx):
+    """
+    Checks approximate_analysis() against the exact analytics
+
+    - Coverage: each exact figure should fall inside its reported
+      interval. With hundreds of intervals some misses are expected, so
+      coverage may be up to 10 points below the nominal confidence level.
+    - Width: the median relative half-width of each group must stay
+      within MAX_HALF_WIDTH, so trivially wide intervals fail.
+    - Recall: the reported top products and customers are compared with
+      the exact rankings of all products and customers.
+    """
+    checks = []
+    widths = {group: [] for group in MAX_HALF_WIDTH}
+
+    def interval(group, label, low, high, exact):
+        checks.append((label, low <= exact <= high))
+        widths[group].append(_half_width(low, high, exact))
+
+    revenue = approx["total_revenue"]
+    interval("total_revenue", "total_revenue",
+             revenue["ci_low"], revenue["ci_high"], expected["total_revenue"])
+
+    for region, data in expected["region_wise_sales"].items():
+        low, high = approx["region_sales"].get(region, {}).get("sales_ci", (0, -1))
+        interval("regions", f"region {region}", low, high, data["total_sales"])
+
+    exact_products = {name: qty for name, qty, _ in expected["product_totals"]}
+    for name, _, low, high in approx["top_products"]:
+        interval("products", f"product {name}", low, high, exact_products.get(name, 0))
+
+    exact_customers = {
+        cid: data["total_spent"] for cid, data in expected["customer_analysis"].items()
+    }
+    for cid, _, low, high in approx["top_customers"]:
+        interval("customers", f"customer {cid}", low, high, exact_customers.get(cid, 0))
+
+    for date, data in expected["daily_sales_trend"].items():
+        estimate = approx["daily_unique_customers"].get(date, {"ci_low": 0, "ci_high": -1})
+        interval("uniques", f"uniques {date}",
+                 estimate["ci_low"], estimate["ci_high"], data["unique_customers"])
+
+    misses = [label for label, inside in checks if not inside]
+    coverage = 1 - len(misses) / len(checks)
+    ok = coverage >= approx["confidence"] - 0.10
+    detail = f"coverage {coverage:.1%} of {len(checks)} intervals"
+
+    too_wide = []
+    for group, values in widths.items():
+        if values:
+            median = sorted(values)[len(values) // 2]
+            if median > MAX_HALF_WIDTH[group]:
+                too_wide.append(f"{group} ±{median:.0%} > ±{MAX_HALF_WIDTH[group]:.0%}")
+    ok = ok and not too_wide
+
+    recalls = {
+        "products": _top_k_recall([name for name, *_ in approx["top_products"]], exact_products),
+        "customers": _top_k_recall([cid for cid, *_ in approx["top_customers"]], exact_customers),
+    }
+    ok = ok and all(recall >= MIN_TOP_K_RECALL for recall in recalls.values())
+    detail += "; top-k recall " + ", ".join(
+        f"{group} {recall:.0%}" for group, recall in recalls.items()
+    )
+
+    if too_wide:
+        detail += "; too wide: " + ", ".join(too_wide)
+    if misses:
+        detail += "; missed: " + ", ".join(misses[:5])
+
+    return ok, detail
+
+
+# =========================================================
+# ENGINE REGISTRY
+# =========================================================
+#
+# Each case maps a reference implementation to its alternatives. All
+# callables take the dataset context; `check(reference_output,
+# alternative_output)` returns (ok, detail). Alternatives listed in
+# `memory_budgets` (engine -> bytes) also fail when their peak traced
+# memory exceeds the budget plus MEMORY_SLACK. Register new engines here.
+
+def _all_analytics(transactions):
+    return {
+        "total_revenue": dp.calculate_total_revenue(transactions),
+        "region_wise_sales": dp.region_wise_sales(transactions),
+        "top_selling_products": dp.top_selling_products(transactions),
+        "customer_analysis": dp.customer_analysis(transactions),
+        "daily_sales_trend": dp.daily_sales_trend(transactions),
+        "find_peak_sales_day": dp.find_peak_sales_day(transactions),
+        "low_performing_products": dp.low_performing_products(transactions),
+        # Exact totals for every product, used to check sketch intervals
+        "product_totals": dp.top_selling_products(transactions, n=None),
+    }
+
+
+def _approximate(transactions):
+    from utils.approx_processor import approximate_analysis
+    sample_size = max(int(len(transactions) * APPROX_SAMPLE_FRACTION), 1)
+    return approximate_analysis(transactions, sample_size=sample_size, seed=0)
+
+
+def _top_customers(transactions):
+    return dict(list(dp.customer_analysis(transactions).items())[:5])
+
+
+def _external_customers(transactions, n=None):
+    from utils.external_aggregation import customer_analysis_external
+    return customer_analysis_external(transactions, memory_limit=EXTERNAL_BUDGET, n=n)
+
+
+def _external_products(transactions):
+    from utils.external_aggregation import top_selling_products_external
+    return top_selling_products_external(transactions, memory_limit=EXTERNAL_BUDGET)
+
+
+def _external_low_products(transactions):
+    from utils.external_aggregation import low_performing_products_external
+    return low_performing_products_external(transactions, memory_limit=EXTERNAL_BUDGET)
+
+
+def _external_daily_trend(transactions):
+    from utils.external_aggregation import daily_sales_trend_external
+    return daily_sales_trend_external(transactions, memory_limit=EXTERNAL_BUDGET)
+
+
+def _read_shards(ctx, workers=None):
+    from utils.file_handler import read_sales_files
+
+    transactions, _ = read_sales_files([ctx["shard_dir"]], workers=workers)
+    return transactions
+
+
+def _stream_shards(ctx):
+    from utils.file_handler import iter_sales_files
+    return list(iter_sales_files([ctx["shard_dir"]]))
+
+
+def _enrich(ctx):
+    from utils.api_handler import enrich_sales_data
+
+    with tempfile.TemporaryDirectory(prefix="engine-harness-") as directory:
+        return enrich_sales_data(
+            ctx["valid"], ctx["product_mapping"], os.path.join(directory, "enriched.txt")
+        )
+
+
+CASES = {
+    "parse_transactions": {
+        "reference": lambda ctx: dp.parse_transactions(ctx["raw_lines"]),
+        "alternatives": {},
+        "check": check_exact,
+    },
+    "read_sales_files": {
+        # Every engine reads the same SHARDS files from disk
+        "reference": lambda ctx: _read_shards(ctx, workers=1),
+        "alternatives": {
+            "parallel workers": _read_shards,
+            "streamed (iter_sales_files)": _stream_shards,
+        },
+        "check": check_exact,
+    },
+    "validate_and_filter": {
+        "reference": lambda ctx: dp.validate_and_filter(ctx["parsed"]),
+        "alternatives": {},
+        "check": check_exact,
+    },
+    "calculate_total_revenue": {
+        "reference": lambda ctx: dp.calculate_total_revenue(ctx["valid"]),
+        "alternatives": {},
+        "check": check_exact,
+    },
+    "region_wise_sales": {
+        "reference": lambda ctx: dp.region_wise_sales(ctx["valid"]),
+        "alternatives": {},
+        "check": check_exact,
+    },
+    "top_selling_products": {
+        "reference": lambda ctx: dp.top_selling_products(ctx["valid"]),
+        "alternatives": {"external (1 MB budget)": lambda ctx: _external_products(ctx["valid"])},
+        "memory_budgets": {"external (1 MB budget)": EXTERNAL_BUDGET},
+        "check": check_exact,
+    },
+    "customer_analysis": {
+        "reference": lambda ctx: dp.customer_analysis(ctx["valid"]),
+        # The full result has one entry per customer, so no budget applies
+        "alternatives": {"external (1 MB budget)": lambda ctx: _external_customers(ctx["valid"])},
+        "check": check_exact,
+    },
+    "top_customers": {
+        "reference": lambda ctx: _top_customers(ctx["valid"]),
+        "alternatives": {
+            "external (1 MB budget, n=5)": lambda ctx: _external_customers(ctx["valid"], n=5),
+        },
+        "memory_budgets": {"external (1 MB budget, n=5)": EXTERNAL_BUDGET},
+        "check": check_exact,
+    },
+    "daily_sales_trend": {
+        "reference": lambda ctx: dp.daily_sales_trend(ctx["valid"]),
+        "alternatives": {
+            "external (1 MB budget)": lambda ctx: _external_daily_trend(ctx["valid"]),
+        },
+        "memory_budgets": {"external (1 MB budget)": EXTERNAL_BUDGET},
+        "check": check_exact,
+    },
+    "find_peak_sales_day": {
+        "reference": lambda ctx: dp.find_peak_sales_day(ctx["valid"]),
+        "alternatives": {},
+        "check": check_exact,
+    },
+    "low_performing_products": {
+        "reference": lambda ctx: dp.low_performing_products(ctx["valid"]),
+        "alternatives": {
+            "external (1 MB budget)": lambda ctx: _external_low_products(ctx["valid"]),
+        },
+        "memory_budgets": {"external (1 MB budget)": EXTERNAL_BUDGET},
+        "check": check_exact,
+    },
+    "all_analytics": {
+        "reference": lambda ctx: _all_analytics(ctx["valid"]),
+        "alternatives": {"approximate_analysis": lambda ctx: _approximate(ctx["valid"])},
+        "check": check_approximate,
+    },
+    "enrich_sales_data": {
+        "reference": _enrich,
+        "alternatives": {},
+        "check": check_exact,
+    },
+}
+
+
+# =========================================================
+# MEASUREMENT
+# =========================================================
+
+def measure(func, ctx, repeat):
+    """
+    Returns (output, best wall time in seconds, peak traced memory in bytes)
+    """
+    best = float("inf")
+    output = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = func(ctx)
+            best = min(best, time.perf_counter() - start)
+
+        # Separate run: tracemalloc slows execution down
+        tracemalloc.start()
+        try:
+            func(ctx)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return output, best, peak
+
+
+def git_revision():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_shards(lines, directory, shards=SHARDS):
+    """
+    Splits lines into `shards` sales files (each with the header) so
+    multi-file readers are timed on reading alone
+    """
+    size = -(-len(lines) // shards)
+    for i in range(shards):
+        with open(os.path.join(directory, f"sales_{i:02d}.txt"), "w", encoding="utf-8") as f:
+            f.write(HEADER + "\n")
+            f.write("\n".join(lines[i * size:(i + 1) * size]) + "\n")
+
+
+def build_context(rows, seed, directory):
+    raw_lines = generate_raw_lines(rows, seed)
+    parsed = dp.parse_transactions(raw_lines)
+    with contextlib.redirect_stdout(io.StringIO()):
+        valid, _, _ = dp.validate_and_filter(parsed)
+    write_shards(raw_lines, directory)
+    return {
+        "raw_lines": raw_lines,
+        "parsed": parsed,
+        "valid": valid,
+        "product_mapping": synthetic_product_mapping(),
+        "shard_dir": directory,
+    }
+
+
+def run_case(name, case, ctx, repeat):
+    """
+    Returns one result record per alternative (or one for the reference
+    alone when nothing is registered yet)
+    """
+    try:
+        ref_output, ref_time, ref_peak = measure(case["reference"], ctx, repeat)
+    except ImportError as e:
+        return [{"case": name, "engine": None, "status": "skipped", "detail": str(e)}]
+
+    base = {
+        "case": name,
+        "reference_seconds": round(ref_time, 6),
+        "reference_peak_bytes": ref_peak,
+    }
+
+    if not case["alternatives"]:
+        return [dict(base, engine=None, status="reference-only")]
+
+    records = []
+    for engine, func in case["alternatives"].items():
+        try:
+            alt_output, alt_time, alt_peak = measure(func, ctx, repeat)
+        except ImportError as e:
+            records.append(dict(base, engine=engine, status="skipped", detail=str(e)))
+            continue
+
+        ok, detail = case["check"](ref_output, alt_output)
+        budget = case.get("memory_budgets", {}).get(engine)
+        if budget is not None and alt_peak > budget + MEMORY_SLACK:
+            ok = False
+            over = f"peak {alt_peak / 1e6:.1f} MB exceeds {budget / 1e6:.1f} MB budget"
+            detail = f"{detail}; {over}" if detail else over
+        records.append(dict(
+            base,
+            engine=engine,
+            status="pass" if ok else "FAIL",
+            detail=detail,
+            alternative_seconds=round(alt_time, 6),
+            alternative_peak_bytes=alt_peak,
+            speedup=round(ref_time / alt_time, 3) if alt_time else None,
+            memory_ratio=round(alt_peak / ref_peak, 3) if ref_peak else None,
+            memory_budget_bytes=budget,
+        ))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000],
+                        help="dataset sizes to generate (default: 10000 100000)")
+    parser.add_argument("--seed", type=int, default=7, help="dataset seed (default: 7)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per engine (default: 3)")
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), help="run only these cases")
+    parser.add_argument("--history", default=DEFAULT_HISTORY,
+                        help="JSON-lines file the results are appended to")
+    args = parser.parse_args()
+
+    cases = {name: CASES[name] for name in (args.only or CASES)}
+    failed = False
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory(prefix="engine-harness-") as directory:
+            ctx = build_context(rows, args.seed, directory)
+            print(f"\nDATASET: {rows} rows ({len(ctx['valid'])} valid), seed {args.seed}")
+            print(f"{'Case':<26}{'Engine':<38}{'Status':<16}{'Speedup':>9}{'Peak MB':>10}")
+            print("-" * 99)
+
+            results = []
+            for name, case in cases.items():
+                for record in run_case(name, case, ctx, args.repeat):
+                    results.append(record)
+                    failed = failed or record["status"] == "FAIL"
+
+                    speedup = record.get("speedup")
+                    peak = record.get("alternative_peak_bytes", record.get("reference_peak_bytes"))
+                    print(
+                        f"{name:<26}{record['engine'] or '(reference)':<38}{record['status']:<16}"
+                        f"{f'{speedup:.2f}x' if speedup else '-':>9}"
+                        f"{f'{peak / 1e6:.1f}' if peak is not None else '-':>10}"
+                    )
+                    if record.get("detail"):
+                        print(f"    {record['detail']}")
+
+        entry = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "rows": rows,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "results": results,
+        }
+        history_dir = os.path.dirname(os.path.abspath(args.history))
+        os.makedirs(history_dir, exist_ok=True)
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    print(f"\nResults appended to {args.history}")
+    if failed:
+        print("❌ Some engines disagree with their reference or exceed their memory budget")
+        sys.exit(1)
+    print("✓ All alternative engines match their reference")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Startup-time benchmark for the main entry point
+
+Measures, in fresh interpreters, how long it takes to import main.py,
+to get through argument parsing (`main.py --help`) and to complete a
+full `--offline` run on data/sales_data.txt. It then checks that the
+offline run finished without loading the HTTP stack.
+
+The offline run answers 'n' to the filter prompt and runs in a
+temporary directory, so output/sales_report.txt in the repo is not
+touched.
+
+Usage:
+    python benchmarks/startup_time.py [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SALES_FILE = os.path.join(ROOT, "data", "sales_data.txt")
+MAIN_FILE = os.path.join(ROOT, "main.py")
+
+DEFERRED_MODULES = ("requests", "utils.api_handler", "utils.approx_processor")
+
+# Runs a complete offline pipeline, then reports which deferred modules it loaded
+OFFLINE_RUN = (
+    "import sys, main; "
+    f"main.main(['--offline', {SALES_FILE!r}]); "
+    f"print('LOADED:' + ','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+)
+
+SCENARIOS = {
+    "python (baseline)": [sys.executable, "-c", "pass"],
+    "import main": [sys.executable, "-c", "import main"],
+    "main.py --help": [sys.executable, MAIN_FILE, "--help"],
+    "main.py --offline": [sys.executable, "-c", OFFLINE_RUN],
+}
+
+
+def run(cmd, workdir):
+    """
+    Runs cmd in workdir with ROOT importable and 'n' on stdin
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run(
+        cmd, cwd=workdir, env=env, input="n\n", capture_output=True, text=True, check=True
+    )
+
+
+def time_command(cmd, runs, workdir):
+    """
+    Runs cmd `runs` times and returns the wall-clock durations in ms
+    """
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run(cmd, workdir)
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20, help="runs per scenario (default: 20)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="startup-bench-") as workdir:
+        os.makedirs(os.path.join(workdir, "output"))
+
+        print(f"{'Scenario':<22}{'Median (ms)':>14}{'Min (ms)':>12}")
+        print("-" * 48)
+        for name, cmd in SCENARIOS.items():
+            durations = time_command(cmd, args.runs, workdir)
+            print(f"{name:<22}{statistics.median(durations):>14.1f}{min(durations):>12.1f}")
+
+        output = run(SCENARIOS["main.py --offline"], workdir).stdout
+        report_written = os.path.exists(os.path.join(workdir, "output", "sales_report.txt"))
+
+    markers = [line for line in output.splitlines() if line.startswith("LOADED:")]
+    print()
+    if not markers or not report_written or "Process Complete" not in output:
+        print("❌ The offline run did not complete")
+        sys.exit(1)
+
+    loaded = markers[-1][len("LOADED:"):]
+    if loaded:
+        print(f"❌ Offline run loaded deferred modules: {loaded}")
+        sys.exit(1)
+    print(f"✓ Offline run completed without loading: {', '.join(DEFERRED_MODULES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
-from utils.file_handler import read_sales_data
+import argparse
+
+from utils.file_handler import read_sales_files, iter_sales_files, compressed_filename
 from utils.data_processor import (
-    parse_transactions,
     validate_and_filter,
+    iter_valid_transactions,
     calculate_total_revenue,
     region_wise_sales,
     top_selling_products,
@@ -10,18 +12,128 @@ from utils.data_processor import (
     find_peak_sales_day,
     low_performing_products,
 )
-from utils.api_handler import (
-    fetch_all_products,
-    create_product_mapping,
-    enrich_sales_data,
-)
-from utils.report_generator import generate_sales_report
+from utils.report_generator import generate_sales_report, generate_approximate_report
+
+# utils.api_handler (which pulls in requests) and utils.approx_processor
+# (which pulls in statistics) are imported by the stages that use them.
+
+
+def _confidence_level(value):
+    level = float(value)
+    if not 0 < level < 1:
+        raise argparse.ArgumentTypeError(f"must be between 0 and 1 (exclusive), got {value}")
+    return level
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def _filter_options(transactions):
+    """
+    Returns (regions, min_amount, max_amount) for the filter prompt in
+    one pass, so it also works on a stream of rows
+    """
+    regions = set()
+    min_amount = None
+    max_amount = None
+
+    for tx in transactions:
+        if tx.get("Region"):
+            regions.add(tx["Region"])
+        if tx["Quantity"] > 0 and tx["UnitPrice"] > 0:
+            amount = tx["Quantity"] * tx["UnitPrice"]
+            min_amount = amount if min_amount is None else min(min_amount, amount)
+            max_amount = amount if max_amount is None else max(max_amount, amount)
+
+    return sorted(regions), min_amount, max_amount
+
+
+def parse_args(argv=None):
+    """
+    Parses command-line options
+    """
+    parser = argparse.ArgumentParser(description="Sales Analytics System")
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        default=["data/sales_data.txt"],
+        help="sales files, directories or glob patterns; '.gz' files are supported "
+             "(default: data/sales_data.txt)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of parallel reader processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--approximate",
+        action="store_true",
+        help="use sampling and sketches for fast, error-bounded estimates",
+    )
+    parser.add_argument(
+        "--sample-size",
+        type=_positive_int,
+        default=10000,
+        help="number of sampled transactions in approximate mode (default: 10000)",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=_confidence_level,
+        default=0.95,
+        help="confidence level for approximate intervals (default: 0.95)",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=_positive_int,
+        default=None,
+        metavar="MB",
+        help="stream the input files instead of loading them, and aggregate "
+             "customers and products out-of-core, spilling to disk beyond this "
+             "many MB of state",
+    )
+    parser.add_argument(
+        "--spill-dir",
+        default=None,
+        help="directory for out-of-core spill files (default: system temp dir)",
+    )
+    parser.add_argument(
+        "--offline",
+        "--skip-enrichment",
+        dest="offline",
+        action="store_true",
+        help="skip API enrichment; the HTTP stack is never loaded",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["gzip", "zstd"],
+        default=None,
+        help="compress the enriched data file",
+    )
+    args = parser.parse_args(argv)
+
+    if args.approximate and args.memory_limit is not None:
+        parser.error("--approximate samples rows in memory and cannot be combined with --memory-limit")
 
+    if args.compression == "zstd" and not args.offline:
+        from importlib.util import find_spec
 
-def main():
+        if find_spec("zstandard") is None:
+            parser.error("--compression zstd requires the 'zstandard' package (pip install zstandard)")
+
+    return args
+
+
+def main(argv=None):
     """
     Main execution function
     """
+    args = parse_args(argv)
+    memory_limit = args.memory_limit * 1024 * 1024 if args.memory_limit is not None else None
 
     try:
         print("=" * 40)
@@ -32,30 +144,44 @@ def main():
         # 1. Read sales data
         # -------------------------------------------------
         print("\n[1/10] Reading sales data...")
-        raw_lines = read_sales_data("data/sales_data.txt")
-        print(f"✓ Successfully read {len(raw_lines)} transactions")
+        if memory_limit is None:
+            parsed_transactions, read_summary = read_sales_files(args.inputs, workers=args.workers)
+            regions, low_amount, high_amount = _filter_options(parsed_transactions)
+        else:
+            from utils.external_aggregation import duplicate_positions_external
+
+            # Out-of-core mode never holds all rows: every later stage makes
+            # its own pass over the input files, skipping the duplicate rows
+            # found here instead of rebuilding TransactionID sets
+            drop_positions = duplicate_positions_external(
+                iter_sales_files(args.inputs, drop_positions=()),
+                memory_limit=memory_limit,
+                spill_dir=args.spill_dir,
+            )
+            read_summary = {}
+            regions, low_amount, high_amount = _filter_options(
+                iter_sales_files(args.inputs, read_summary, drop_positions)
+            )
+        print(
+            f"✓ Successfully read {read_summary['raw_lines']} transactions "
+            f"from {read_summary['files']} file(s)"
+        )
 
         # -------------------------------------------------
-        # 2. Parse and clean
+        # 2. Parse and clean (done by the reader workers)
         # -------------------------------------------------
         print("\n[2/10] Parsing and cleaning data...")
-        parsed_transactions = parse_transactions(raw_lines)
-        print(f"✓ Parsed {len(parsed_transactions)} records")
+        print(f"✓ Parsed {read_summary['parsed']} records")
+        if read_summary["duplicates"]:
+            print(f"✓ Removed {read_summary['duplicates']} duplicate TransactionIDs")
 
         # -------------------------------------------------
         # 3. Display filter options
         # -------------------------------------------------
-        regions = sorted(set(tx["Region"] for tx in parsed_transactions if tx.get("Region")))
-        amounts = [
-            tx["Quantity"] * tx["UnitPrice"]
-            for tx in parsed_transactions
-            if tx["Quantity"] > 0 and tx["UnitPrice"] > 0
-        ]
-
         print("\n[3/10] Filter Options Available:")
         print("Regions:", ", ".join(regions))
-        if amounts:
-            print(f"Amount Range: ₹{int(min(amounts)):,} - ₹{int(max(amounts)):,}")
+        if low_amount is not None:
+            print(f"Amount Range: ₹{int(low_amount):,} - ₹{int(high_amount):,}")
 
         apply_filter = input("\nDo you want to filter data? (y/n): ").strip().lower()
 
@@ -77,58 +203,130 @@ def main():
         # 4. Validate and filter
         # -------------------------------------------------
         print("\n[4/10] Validating transactions...")
-        valid_transactions, invalid_count, summary = validate_and_filter(
-            parsed_transactions,
-            region=region_filter,
-            min_amount=min_amount,
-            max_amount=max_amount
-        )
+        if memory_limit is None:
+            valid_transactions, invalid_count, summary = validate_and_filter(
+                parsed_transactions,
+                region=region_filter,
+                min_amount=min_amount,
+                max_amount=max_amount
+            )
+            valid_count = len(valid_transactions)
+        else:
+            def valid_rows(summary=None):
+                return iter_valid_transactions(
+                    iter_sales_files(args.inputs, drop_positions=drop_positions),
+                    region=region_filter,
+                    min_amount=min_amount,
+                    max_amount=max_amount,
+                    summary=summary,
+                )
 
-        print(f"✓ Valid: {len(valid_transactions)} | Invalid: {invalid_count}")
+            summary = {}
+            valid_count = sum(1 for _ in valid_rows(summary))
+            invalid_count = summary["invalid"]
+
+        print(f"✓ Valid: {valid_count} | Invalid: {invalid_count}")
 
         # -------------------------------------------------
         # 5. Analysis
         # -------------------------------------------------
         print("\n[5/10] Analyzing sales data...")
-        calculate_total_revenue(valid_transactions)
-        region_wise_sales(valid_transactions)
-        top_selling_products(valid_transactions)
-        customer_analysis(valid_transactions)
-        daily_sales_trend(valid_transactions)
-        find_peak_sales_day(valid_transactions)
-        low_performing_products(valid_transactions)
-        print("✓ Analysis complete")
+        if args.approximate:
+            from utils.approx_processor import approximate_analysis
+
+            approx_results = approximate_analysis(
+                valid_transactions,
+                sample_size=args.sample_size,
+                confidence=args.confidence,
+            )
+            print("✓ Approximate analysis complete")
+        elif memory_limit is not None:
+            # Each aggregate is one streamed pass; run them once, for the report
+            print("✓ Analysis runs out-of-core while the report is generated")
+        else:
+            calculate_total_revenue(valid_transactions)
+            region_wise_sales(valid_transactions)
+            top_selling_products(valid_transactions)
+            customer_analysis(valid_transactions)
+            daily_sales_trend(valid_transactions)
+            find_peak_sales_day(valid_transactions)
+            low_performing_products(valid_transactions)
+            print("✓ Analysis complete")
 
         # -------------------------------------------------
         # 6. Fetch API data
         # -------------------------------------------------
         print("\n[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
-        product_mapping = create_product_mapping(api_products)
-        print(f"✓ Fetched {len(api_products)} products")
+        if args.offline:
+            enriched_transactions = None
+            print("✓ Skipped (offline)")
 
-        # -------------------------------------------------
-        # 7. Enrich data
-        # -------------------------------------------------
-        print("\n[7/10] Enriching sales data...")
-        enriched_transactions = enrich_sales_data(valid_transactions, product_mapping)
+            print("\n[7/10] Enriching sales data...")
+            print("✓ Skipped (offline)")
 
-        success_count = sum(1 for tx in enriched_transactions if tx.get("API_Match"))
-        success_rate = (success_count / len(enriched_transactions)) * 100 if enriched_transactions else 0
+            print("\n[8/10] Saving enriched data...")
+            print("✓ Skipped (offline)")
 
-        print(f"✓ Enriched {success_count}/{len(enriched_transactions)} transactions ({success_rate:.1f}%)")
+        else:
+            from utils.api_handler import (
+                fetch_all_products,
+                create_product_mapping,
+                enrich_transaction,
+                enrich_sales_data,
+                save_enriched_data,
+            )
 
-        # -------------------------------------------------
-        # 8. Save enriched data (already done inside function)
-        # -------------------------------------------------
-        print("\n[8/10] Saving enriched data...")
-        print("✓ Saved to: data/enriched_sales_data.txt")
+            api_products = fetch_all_products()
+            product_mapping = create_product_mapping(api_products)
+            print(f"✓ Fetched {len(api_products)} products")
+
+            # -------------------------------------------------
+            # 7. Enrich data
+            # -------------------------------------------------
+            print("\n[7/10] Enriching sales data...")
+            enriched_file = compressed_filename("data/enriched_sales_data.txt", args.compression)
+            if memory_limit is None:
+                enriched_transactions = enrich_sales_data(valid_transactions, product_mapping, save=False)
+                to_save = enriched_transactions
+
+                success_count = sum(1 for tx in enriched_transactions if tx.get("API_Match"))
+                success_rate = (success_count / len(enriched_transactions)) * 100 if enriched_transactions else 0
+
+                print(f"✓ Enriched {success_count}/{len(enriched_transactions)} transactions ({success_rate:.1f}%)")
+            else:
+                # Enriched rows are streamed straight into the writer, and the
+                # report enriches its own pass, so they are never all held
+                def enriched_rows():
+                    return (enrich_transaction(tx, product_mapping) for tx in valid_rows())
+
+                enriched_transactions = enriched_rows()
+                to_save = enriched_rows()
+                print("✓ Enriched rows are streamed into the saved file")
+
+            # -------------------------------------------------
+            # 8. Save enriched data
+            # -------------------------------------------------
+            print("\n[8/10] Saving enriched data...")
+            saved_files = save_enriched_data(to_save, enriched_file, compression=args.compression)
+            if saved_files:
+                for path in saved_files:
+                    print(f"✓ Saved to: {path}")
+            else:
+                print("❌ Enriched data was not saved")
 
         # -------------------------------------------------
         # 9. Generate report
         # -------------------------------------------------
         print("\n[9/10] Generating report...")
-        generate_sales_report(valid_transactions, enriched_transactions)
+        if args.approximate:
+            generate_approximate_report(approx_results)
+        else:
+            generate_sales_report(
+                valid_transactions if memory_limit is None else valid_rows,
+                enriched_transactions,
+                memory_limit=memory_limit,
+                spill_dir=args.spill_dir,
+            )
         print("✓ Report saved to: output/sales_report.txt")
 
         # -------------------------------------------------
@@ -1,5 +1,7 @@
 import requests
 
+from utils.file_handler import compressed_filename, write_records
+
 
 def fetch_all_products():
     """
@@ -52,43 +54,54 @@ def create_product_mapping(api_products):
             }
 
     return product_mapping
-def enrich_sales_data(transactions, product_mapping):
+
+
+def enrich_transaction(tx, product_mapping):
     """
-    Enriches transaction data with API product information
+    Returns a copy of one transaction with the API product fields added
     """
-    enriched_transactions = []
-
-    for tx in transactions:
-        enriched_tx = tx.copy()
-
-        try:
-            # Extract numeric ID from ProductID (P101 -> 101)
-            numeric_id = int("".join(filter(str.isdigit, tx["ProductID"]))) % 100
-            if numeric_id == 0:
-                numeric_id = 100
-
-            if numeric_id in product_mapping:
-                api_data = product_mapping[numeric_id]
-
-                enriched_tx["API_Category"] = api_data["category"]
-                enriched_tx["API_Brand"] = api_data["brand"]
-                enriched_tx["API_Rating"] = api_data["rating"]
-                enriched_tx["API_Match"] = True
-            else:
-                enriched_tx["API_Category"] = None
-                enriched_tx["API_Brand"] = None
-                enriched_tx["API_Rating"] = None
-                enriched_tx["API_Match"] = False
-
-        except Exception:
+    enriched_tx = tx.copy()
+
+    try:
+        # Extract numeric ID from ProductID (P101 -> 101)
+        numeric_id = int("".join(filter(str.isdigit, tx["ProductID"]))) % 100
+        if numeric_id == 0:
+            numeric_id = 100
+
+        if numeric_id in product_mapping:
+            api_data = product_mapping[numeric_id]
+
+            enriched_tx["API_Category"] = api_data["category"]
+            enriched_tx["API_Brand"] = api_data["brand"]
+            enriched_tx["API_Rating"] = api_data["rating"]
+            enriched_tx["API_Match"] = True
+        else:
             enriched_tx["API_Category"] = None
             enriched_tx["API_Brand"] = None
             enriched_tx["API_Rating"] = None
             enriched_tx["API_Match"] = False
 
-        enriched_transactions.append(enriched_tx)
+    except Exception:
+        enriched_tx["API_Category"] = None
+        enriched_tx["API_Brand"] = None
+        enriched_tx["API_Rating"] = None
+        enriched_tx["API_Match"] = False
+
+    return enriched_tx
+
+
+def enrich_sales_data(transactions, product_mapping, output_file="data/enriched_sales_data.txt",
+                      compression=None, save=True):
+    """
+    Enriches transaction data with API product information
+
+    With save=False the caller is responsible for save_enriched_data().
+    """
+    enriched_transactions = [enrich_transaction(tx, product_mapping) for tx in transactions]
+
+    if save:
+        save_enriched_data(enriched_transactions, output_file, compression=compression)
 
-    save_enriched_data(enriched_transactions)
     matched = sum(1 for tx in enriched_transactions if tx.get("API_Match"))
     total = len(enriched_transactions)
     percentage = (matched / total * 100) if total else 0
@@ -98,38 +111,29 @@ def enrich_sales_data(transactions, product_mapping):
     return enriched_transactions
 
 
-def save_enriched_data(enriched_transactions, filename="data/enriched_sales_data.txt"):
+ENRICHED_COLUMNS = [
+    "TransactionID", "Date", "ProductID", "ProductName", "Quantity", "UnitPrice",
+    "CustomerID", "Region", "API_Category", "API_Brand", "API_Rating", "API_Match",
+]
+
+
+def save_enriched_data(enriched_transactions, filename="data/enriched_sales_data.txt",
+                       compression=None):
     """
     Saves enriched transactions back to file
-    """
-    header = (
-        "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|"
-        "CustomerID|Region|API_Category|API_Brand|API_Rating|API_Match\n"
-    )
 
+    - enriched_transactions: any iterable; rows are written in batches
+    - compression: None, 'gzip' or 'zstd'
+
+    Returns: list of files written (empty if saving failed)
+    """
     try:
-        with open(filename, "w", encoding="utf-8") as file:
-            file.write(header)
-
-            for tx in enriched_transactions:
-                row = [
-                    str(tx.get("TransactionID", "")),
-                    str(tx.get("Date", "")),
-                    str(tx.get("ProductID", "")),
-                    str(tx.get("ProductName", "")),
-                    str(tx.get("Quantity", "")),
-                    str(tx.get("UnitPrice", "")),
-                    str(tx.get("CustomerID", "")),
-                    str(tx.get("Region", "")),
-                    str(tx.get("API_Category", "")),
-                    str(tx.get("API_Brand", "")),
-                    str(tx.get("API_Rating", "")),
-                    str(tx.get("API_Match", ""))
-                ]
-
-                file.write("|".join(row) + "\n")
-
-        print(f"✅ Enriched data saved to {filename}")
-
-    except IOError as e:
+        path = compressed_filename(filename, compression)
+        write_records(path, ENRICHED_COLUMNS, enriched_transactions, compression=compression)
+
+        print(f"✅ Enriched data saved to {path}")
+        return [path]
+
+    except (OSError, ValueError) as e:
         print(f"❌ Failed to save enriched data: {e}")
+        return []
@@ -0,0 +1,401 @@
+import hashlib
+import math
+import random
+from array import array
+from statistics import NormalDist
+
+
+# =========================================================
+# SKETCHES
+# =========================================================
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters sketch with at most `capacity` counters.
+    Each counter over-estimates its key by no more than its recorded error.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counters = {}
+        self.errors = {}
+
+    def add(self, key, weight=1):
+        if key in self.counters:
+            self.counters[key] += weight
+            return
+
+        if len(self.counters) < self.capacity:
+            self.counters[key] = weight
+            self.errors[key] = 0
+            return
+
+        # Replace the smallest counter and inherit its count as error
+        victim = min(self.counters, key=self.counters.get)
+        floor = self.counters.pop(victim)
+        del self.errors[victim]
+
+        self.counters[key] = floor + weight
+        self.errors[key] = floor
+
+    def top(self, n):
+        """
+        Returns list of (key, estimate, max_error) sorted by estimate
+        """
+        ranked = sorted(self.counters.items(), key=lambda x: x[1], reverse=True)
+        return [(key, count, self.errors[key]) for key, count in ranked[:n]]
+
+
+class HyperLogLog:
+    """
+    HyperLogLog cardinality estimator with 2**precision registers
+    """
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+        if self.m >= 128:
+            self._alpha = 0.7213 / (1 + 1.079 / self.m)
+        elif self.m == 64:
+            self._alpha = 0.709
+        elif self.m == 32:
+            self._alpha = 0.697
+        else:
+            self._alpha = 0.673
+
+    def position(self, item):
+        """
+        Returns the (register index, rank) that item updates
+
+        Hashing dominates the cost of add(); callers that see the same
+        items many times can cache positions and update the registers
+        directly.
+        """
+        # Stable across processes, unlike hash() under PYTHONHASHSEED
+        digest = hashlib.blake2b(str(item).encode("utf-8"), digest_size=8).digest()
+        h = int.from_bytes(digest, "little")
+        index = h & (self.m - 1)
+        rest = h >> self.precision
+        width = 64 - self.precision
+        return index, width - rest.bit_length() + 1
+
+    def add(self, item):
+        index, rank = self.position(item)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def _estimate(self):
+        """
+        Returns (estimate, linear), where linear tells whether the small
+        range correction (linear counting) produced the estimate
+        """
+        total = sum(2.0 ** -r for r in self.registers)
+        estimate = self._alpha * self.m * self.m / total
+
+        # Small range correction (linear counting)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            return self.m * math.log(self.m / zeros), True
+
+        return estimate, False
+
+    def count(self):
+        return self._estimate()[0]
+
+    def relative_error(self):
+        """
+        Standard error of count() relative to the estimate
+
+        Linear counting is much more accurate than the asymptotic
+        1.04 / sqrt(m) bound; its standard error is
+        sqrt(m * (e^t - t - 1)) / n with t = n / m (Whang et al., 1990).
+        """
+        estimate, linear = self._estimate()
+        if linear and estimate:
+            t = estimate / self.m
+            return math.sqrt(self.m * (math.exp(t) - t - 1)) / estimate
+        return 1.04 / math.sqrt(self.m)
+
+
+# =========================================================
+# APPROXIMATE ANALYTICS
+# =========================================================
+
+MIN_STRATUM_SAMPLE = 2
+
+
+def _allocate(region_counts, sample_size):
+    """
+    Proportional allocation of sample_size across regions, with at least
+    MIN_STRATUM_SAMPLE rows per region and never more than the region has
+    """
+    population = sum(region_counts.values())
+    allocation = {}
+
+    for region, count in region_counts.items():
+        share = round(sample_size * count / population) if population else 0
+        allocation[region] = min(count, max(MIN_STRATUM_SAMPLE, share))
+
+    return allocation
+
+
+def _estimate_total(total, total_sq, n, population, fallback_var):
+    """
+    Estimates a stratum total from the sum and sum of squares of a simple
+    random sample of size n drawn from that stratum
+
+    A fully enumerated stratum has no sampling error. A partly sampled
+    stratum whose sample shows no spread (or has a single row) uses
+    fallback_var instead of reporting a zero-width interval.
+
+    Returns: (estimate, variance)
+    """
+    if n == 0:
+        return 0.0, 0.0
+
+    mean = total / n
+    estimate = population * mean
+
+    if n >= population:
+        return estimate, 0.0
+
+    sample_var = max(total_sq - n * mean * mean, 0.0) / (n - 1) if n > 1 else 0.0
+    if sample_var == 0.0:
+        sample_var = fallback_var
+
+    variance = population ** 2 * (1 - n / population) * sample_var / n
+    return estimate, variance
+
+
+def _pooled_variance(values):
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean = sum(values) / n
+    return sum((v - mean) ** 2 for v in values) / (n - 1)
+
+
+def _stratified_total(values_by_region, sample_sizes, region_counts, fallback_var):
+    """
+    Sums per-region estimates; values_by_region holds the sampled values
+    of one domain (rows outside the domain count as zeros)
+
+    Returns: (estimate, variance)
+    """
+    estimate = 0.0
+    variance = 0.0
+
+    for region, count in region_counts.items():
+        values = values_by_region.get(region, [])
+        region_estimate, region_variance = _estimate_total(
+            sum(values), sum(v * v for v in values), sample_sizes[region], count, fallback_var
+        )
+        estimate += region_estimate
+        variance += region_variance
+
+    return estimate, variance
+
+
+def _heavy_hitters(samples, region_counts, key_field, value_of, top_k, n, z):
+    """
+    Finds the top n keys of a stratified sample and returns population
+    estimates with confidence intervals
+
+    A Space-Saving sketch (rows weighted by region size / region sample
+    size) keeps top_k candidates, which include every key holding more
+    than 1/top_k of the weighted total. Sketch counts of late arrivals
+    are inflated by the counters they replaced, so the candidates are
+    ranked by their stratified estimates rather than by sketch count.
+    """
+    sketch = SpaceSaving(top_k)
+    sample_sizes = {region: len(rows) for region, rows in samples.items()}
+
+    for region, rows in samples.items():
+        weight = region_counts[region] / len(rows) if rows else 0
+        for tx in rows:
+            sketch.add(tx[key_field], value_of(tx) * weight)
+
+    # Sampled values of each candidate, grouped in one pass
+    values = {key: {} for key in sketch.counters}
+    pooled_count = 0
+    pooled_sum = 0.0
+    pooled_sq = 0.0
+    for region, rows in samples.items():
+        for tx in rows:
+            value = value_of(tx)
+            pooled_count += 1
+            pooled_sum += value
+            pooled_sq += value * value
+            by_region = values.get(tx[key_field])
+            if by_region is not None:
+                by_region.setdefault(region, []).append(value)
+
+    def variance(total, total_sq):
+        if pooled_count < 2:
+            return 0.0
+        return max(total_sq - total * total / pooled_count, 0.0) / (pooled_count - 1)
+
+    all_var = variance(pooled_sum, pooled_sq)
+    estimates = []
+
+    for key, values_by_region in values.items():
+        # Fallback spread: the domain indicator over the pooled sample
+        key_values = [v for region_values in values_by_region.values() for v in region_values]
+        fallback_var = variance(sum(key_values), sum(v * v for v in key_values)) or all_var
+        estimate, key_variance = _stratified_total(
+            values_by_region, sample_sizes, region_counts, fallback_var
+        )
+        estimates.append((key, estimate, key_variance))
+
+    estimates.sort(key=lambda x: x[1], reverse=True)
+    result = []
+
+    for key, estimate, key_variance in estimates[:n]:
+        margin = z * math.sqrt(key_variance)
+        result.append((key, estimate, max(estimate - margin, 0.0), estimate + margin))
+
+    return result
+
+
+def approximate_analysis(transactions, sample_size=10000, top_k=100, n=5,
+                         hll_precision=10, confidence=0.95, seed=None):
+    """
+    Computes error-bounded estimates of the main analytics
+
+    - Revenue and region shares: sample stratified by region (proportional
+      allocation, at least 2 rows per region, small regions taken whole)
+    - Top products / customers: Space-Saving sketch over the sample
+    - Unique customers per day: HyperLogLog over all transactions
+
+    Only the region counts and the HyperLogLog registers touch every row;
+    all revenue figures are computed from the sample.
+
+    Returns: dictionary of estimates with confidence intervals
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+
+    population = len(transactions)
+    rng = random.Random(seed)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    # Single lightweight pass: region row positions and daily distinct
+    # customers. Customers repeat across rows, so each one is hashed once
+    # and every row only updates one register.
+    region_rows = {}
+    daily_customers = {}
+    positions = {}
+    hasher = HyperLogLog(hll_precision)
+
+    for index, tx in enumerate(transactions):
+        rows = region_rows.get(tx["Region"])
+        if rows is None:
+            rows = region_rows[tx["Region"]] = array("q")
+        rows.append(index)
+
+        hll = daily_customers.get(tx["Date"])
+        if hll is None:
+            hll = daily_customers[tx["Date"]] = HyperLogLog(hll_precision)
+        registers = hll.registers
+        cid = tx["CustomerID"]
+        position = positions.get(cid)
+        if position is None:
+            position = positions[cid] = hasher.position(cid)
+        register, rank = position
+        if rank > registers[register]:
+            registers[register] = rank
+
+    region_counts = {region: len(rows) for region, rows in region_rows.items()}
+    allocation = _allocate(region_counts, sample_size)
+    samples = {
+        region: [transactions[rows[i]] for i in rng.sample(range(len(rows)), allocation[region])]
+        for region, rows in region_rows.items()
+    }
+    del region_rows
+
+    # Revenue and region shares
+    region_values = {
+        region: [tx["Quantity"] * tx["UnitPrice"] for tx in rows]
+        for region, rows in samples.items()
+    }
+    fallback_var = _pooled_variance([v for values in region_values.values() for v in values])
+
+    region_estimates = {}
+    total_estimate = 0.0
+    total_variance = 0.0
+
+    for region, count in region_counts.items():
+        values = region_values[region]
+        estimate, variance = _estimate_total(
+            sum(values), sum(v * v for v in values), len(values), count, fallback_var
+        )
+        region_estimates[region] = (estimate, variance)
+        total_estimate += estimate
+        total_variance += variance
+
+    margin = z * math.sqrt(total_variance)
+    total_revenue = {
+        "estimate": round(total_estimate, 2),
+        "ci_low": round(max(total_estimate - margin, 0), 2),
+        "ci_high": round(total_estimate + margin, 2),
+    }
+
+    regions = {}
+    for region, (estimate, variance) in region_estimates.items():
+        region_margin = z * math.sqrt(variance)
+        share = (estimate / total_estimate) * 100 if total_estimate else 0
+        share_low = ((estimate - region_margin) / total_estimate) * 100 if total_estimate else 0
+        share_high = ((estimate + region_margin) / total_estimate) * 100 if total_estimate else 0
+
+        regions[region] = {
+            "total_sales": round(estimate, 2),
+            "sales_ci": (
+                round(max(estimate - region_margin, 0), 2),
+                round(estimate + region_margin, 2),
+            ),
+            "transaction_count": region_counts[region],
+            "percentage": round(share, 2),
+            "percentage_ci": (round(max(share_low, 0), 2), round(min(share_high, 100), 2)),
+        }
+
+    regions = dict(sorted(regions.items(), key=lambda x: x[1]["total_sales"], reverse=True))
+
+    # Heavy hitters
+    top_products = [
+        (name, round(qty), round(low), round(high))
+        for name, qty, low, high in _heavy_hitters(
+            samples, region_counts, "ProductName", lambda tx: tx["Quantity"], top_k, n, z
+        )
+    ]
+    top_customers = [
+        (cid, round(spent, 2), round(low, 2), round(high, 2))
+        for cid, spent, low, high in _heavy_hitters(
+            samples, region_counts, "CustomerID", lambda tx: tx["Quantity"] * tx["UnitPrice"],
+            top_k, n, z
+        )
+    ]
+
+    # Unique customers per day
+    daily_unique = {}
+    for date in sorted(daily_customers):
+        hll = daily_customers[date]
+        estimate = hll.count()
+        rel_margin = z * hll.relative_error()
+        daily_unique[date] = {
+            "unique_customers": round(estimate),
+            "ci_low": max(round(estimate * (1 - rel_margin)), 0),
+            "ci_high": round(estimate * (1 + rel_margin)),
+        }
+
+    return {
+        "confidence": confidence,
+        "transaction_count": population,
+        "sample_size": sum(len(rows) for rows in samples.values()),
+        "total_revenue": total_revenue,
+        "region_sales": regions,
+        "top_products": top_products,
+        "top_customers": top_customers,
+        "daily_unique_customers": daily_unique,
+    }
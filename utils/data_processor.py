@@ -40,6 +40,33 @@ def parse_transactions(raw_lines):
 # TASK 1.3: Data Validation and Filtering
 # =========================================================
 
+def is_valid_transaction(tx):
+    """
+    Applies the business rules for a single parsed transaction
+    """
+    try:
+        return not (
+            tx["Quantity"] <= 0 or
+            tx["UnitPrice"] <= 0 or
+            not tx["CustomerID"] or
+            not tx["Region"] or
+            not tx["TransactionID"].startswith("T") or
+            not tx["ProductID"].startswith("P") or
+            not tx["CustomerID"].startswith("C")
+        )
+    except KeyError:
+        return False
+
+
+def _amount_in_range(tx, min_amount=None, max_amount=None):
+    amount = tx["Quantity"] * tx["UnitPrice"]
+    if min_amount is not None and amount < min_amount:
+        return False
+    if max_amount is not None and amount > max_amount:
+        return False
+    return True
+
+
 def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
     """
     Validates transactions and applies optional filters
@@ -49,22 +76,9 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     total_input = len(transactions)
 
     for tx in transactions:
-        try:
-            if (
-                tx["Quantity"] <= 0 or
-                tx["UnitPrice"] <= 0 or
-                not tx["CustomerID"] or
-                not tx["Region"] or
-                not tx["TransactionID"].startswith("T") or
-                not tx["ProductID"].startswith("P") or
-                not tx["CustomerID"].startswith("C")
-            ):
-                invalid_count += 1
-                continue
-
+        if is_valid_transaction(tx):
             valid_transactions.append(tx)
-
-        except KeyError:
+        else:
             invalid_count += 1
 
     # Display available regions
@@ -89,16 +103,9 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     # Filter by transaction amount
     if min_amount is not None or max_amount is not None:
         before = len(valid_transactions)
-
-        def amount_valid(tx):
-            amount = tx["Quantity"] * tx["UnitPrice"]
-            if min_amount is not None and amount < min_amount:
-                return False
-            if max_amount is not None and amount > max_amount:
-                return False
-            return True
-
-        valid_transactions = [tx for tx in valid_transactions if amount_valid(tx)]
+        valid_transactions = [
+            tx for tx in valid_transactions if _amount_in_range(tx, min_amount, max_amount)
+        ]
         filtered_by_amount = before - len(valid_transactions)
         print(f"🔎 Records after amount filter: {len(valid_transactions)}")
 
@@ -114,6 +121,39 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     return valid_transactions, invalid_count, summary
 
 
+def iter_valid_transactions(transactions, region=None, min_amount=None, max_amount=None,
+                            summary=None):
+    """
+    Streaming counterpart of validate_and_filter(): yields the valid rows
+    that pass the optional filters without building any lists
+
+    Pass a dict as summary to receive the validate_and_filter() summary
+    counts as the rows go by.
+    """
+    counts = {
+        "total_input": 0,
+        "invalid": 0,
+        "filtered_by_region": 0,
+        "filtered_by_amount": 0,
+        "final_count": 0
+    }
+    if summary is not None:
+        summary.update(counts)
+        counts = summary
+
+    for tx in transactions:
+        counts["total_input"] += 1
+        if not is_valid_transaction(tx):
+            counts["invalid"] += 1
+        elif region and tx["Region"] != region:
+            counts["filtered_by_region"] += 1
+        elif not _amount_in_range(tx, min_amount, max_amount):
+            counts["filtered_by_amount"] += 1
+        else:
+            counts["final_count"] += 1
+            yield tx
+
+
 # =========================================================
 # TASK 2.1(a): Total Revenue
 # =========================================================
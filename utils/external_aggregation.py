@@ -0,0 +1,380 @@
+import heapq
+import os
+import pickle
+import tempfile
+
+from utils.data_processor import is_valid_transaction
+
+
+# =========================================================
+# OUT-OF-CORE AGGREGATION
+# =========================================================
+#
+# Rows are aggregated in memory until the estimated size of the
+# per-key state exceeds memory_limit. From then on the partial states
+# and all remaining rows are hash-partitioned by key into spill files,
+# and each partition is aggregated on its own (recursively, if it is
+# still too large). Every key lives in exactly one partition and its
+# rows stay in input order, so sums are computed in the same order as
+# the in-memory functions and the results are identical.
+#
+# The same budget covers the spill buffers: each partition buffers at
+# most memory_limit / num_partitions bytes of records before they are
+# pickled to disk, so state plus buffers stay within memory_limit.
+#
+# A single key whose own state is larger than memory_limit cannot be
+# split; it ends up aggregated in memory once MAX_DEPTH is reached.
+
+DEFAULT_MEMORY_LIMIT = 256 * 1024 * 1024
+DEFAULT_PARTITIONS = 64
+# Beyond this depth a partition is aggregated in memory regardless of the
+# limit (e.g. a single key that is larger than the budget on its own)
+MAX_DEPTH = 4
+
+# Rough CPython sizes used for the memory estimate
+CUSTOMER_ENTRY_BYTES = 600
+PRODUCT_ENTRY_BYTES = 350
+VISIT_ENTRY_BYTES = 330
+ID_ENTRY_BYTES = 360
+POSITION_BYTES = 40
+SET_MEMBER_BYTES = 50
+RECORD_BYTES = 200
+
+ROW = 0
+PARTIAL = 1
+
+
+class _SpillPartitions:
+    """
+    Pickle writers, one spill file per partition, each buffering at most
+    buffer_bytes / num_partitions (estimated) bytes of records
+    """
+
+    def __init__(self, directory, num_partitions, depth, buffer_bytes):
+        # Each depth uses the next base-num_partitions digit of the key
+        # hash, so a recursive pass really splits its parent partition
+        self.divisor = num_partitions ** depth
+        self.paths = [
+            os.path.join(directory, f"d{depth}-p{i:04d}.spill") for i in range(num_partitions)
+        ]
+        self.files = [open(path, "wb") for path in self.paths]
+        self.buffers = [[] for _ in range(num_partitions)]
+        self.buffer_sizes = [0] * num_partitions
+        self.buffer_limit = max(buffer_bytes // num_partitions, RECORD_BYTES)
+        self.buffered = 0
+
+    def add(self, key, record, size=RECORD_BYTES):
+        index = hash(key) // self.divisor % len(self.files)
+        self.buffers[index].append(record)
+        self.buffer_sizes[index] += size
+        self.buffered += size
+        if self.buffer_sizes[index] >= self.buffer_limit:
+            self._flush(index)
+
+    def _flush(self, index):
+        buffer = self.buffers[index]
+        if buffer:
+            pickle.dump(buffer, self.files[index], pickle.HIGHEST_PROTOCOL)
+            buffer.clear()
+        self.buffered -= self.buffer_sizes[index]
+        self.buffer_sizes[index] = 0
+
+    def close(self):
+        for index, file in enumerate(self.files):
+            if not file.closed:
+                self._flush(index)
+                file.close()
+
+
+def _read_partition(path):
+    with open(path, "rb") as file:
+        while True:
+            try:
+                batch = pickle.load(file)
+            except EOFError:
+                return
+            yield from batch
+
+
+def _aggregate(records, new_state, apply, entry_bytes, memory_limit, num_partitions,
+               spill_dir, depth=0):
+    """
+    Aggregates (key, index, kind, payload) records within memory_limit
+
+    `used` counts the estimated bytes of per-key state plus the records
+    waiting in spill buffers.
+
+    Yields: (first_index, key, state) for every key
+    """
+    states = {}
+    used = 0
+    partitions = None
+    workdir = None
+
+    try:
+        for key, index, kind, payload in records:
+            if partitions is not None:
+                partitions.add(key, (key, index, kind, payload))
+                continue
+
+            entry = states.get(key)
+            if entry is None:
+                entry = states[key] = [index, new_state()]
+                used += entry_bytes
+            used += apply(entry[1], kind, payload)
+
+            if used > memory_limit and depth < MAX_DEPTH:
+                workdir = tempfile.TemporaryDirectory(prefix="sales-spill-", dir=spill_dir)
+                partitions = _SpillPartitions(workdir.name, num_partitions, depth, memory_limit)
+
+                # Move state into the buffers one key at a time so the
+                # states and the buffers never both hold the full budget
+                while states:
+                    spilled_key, (first_index, state) = states.popitem()
+                    size = entry_bytes + apply(new_state(), PARTIAL, state)
+                    used -= size
+                    partitions.add(spilled_key, (spilled_key, first_index, PARTIAL, state), size)
+                states.clear()
+                used = partitions.buffered
+
+        if partitions is None:
+            for key, (first_index, state) in states.items():
+                yield first_index, key, state
+            return
+
+        partitions.close()
+        for path in partitions.paths:
+            yield from _aggregate(
+                _read_partition(path), new_state, apply, entry_bytes,
+                memory_limit, num_partitions, spill_dir, depth + 1,
+            )
+            os.remove(path)
+
+    finally:
+        if partitions is not None:
+            partitions.close()
+        if workdir is not None:
+            workdir.cleanup()
+
+
+# =========================================================
+# CUSTOMER ANALYSIS (OUT-OF-CORE)
+# =========================================================
+
+def _new_customer():
+    return [0.0, 0, set()]
+
+
+def _apply_customer(state, kind, payload):
+    """
+    Folds one record into state; returns the estimated bytes added
+    """
+    if kind == PARTIAL:
+        state[0], state[1], state[2] = payload
+        return SET_MEMBER_BYTES * len(state[2])
+
+    amount, product = payload
+    state[0] += amount
+    state[1] += 1
+    if product not in state[2]:
+        state[2].add(product)
+        return SET_MEMBER_BYTES
+    return 0
+
+
+def customer_analysis_external(transactions, memory_limit=DEFAULT_MEMORY_LIMIT, n=None,
+                               num_partitions=DEFAULT_PARTITIONS, spill_dir=None):
+    """
+    Same result as customer_analysis(), computed within memory_limit bytes
+    of aggregation state by spilling hash partitions to disk
+
+    With n set, only the top n customers are kept (bounded memory);
+    otherwise the full result dictionary is returned, which is itself one
+    entry per customer.
+    """
+    records = (
+        (tx["CustomerID"], index, ROW, (tx["Quantity"] * tx["UnitPrice"], tx["ProductName"]))
+        for index, tx in enumerate(transactions)
+    )
+    aggregated = _aggregate(
+        records, _new_customer, _apply_customer, CUSTOMER_ENTRY_BYTES,
+        memory_limit, num_partitions, spill_dir,
+    )
+
+    def finalize(item):
+        first_index, cid, (total_spent, purchase_count, products_bought) = item
+        avg = total_spent / purchase_count
+        return first_index, cid, {
+            "total_spent": round(total_spent, 2),
+            "purchase_count": purchase_count,
+            "avg_order_value": round(avg, 2),
+            "products_bought": sorted(list(products_bought))
+        }
+
+    # Ties keep first-appearance order, as the in-memory stable sort does
+    def rank(item):
+        return -item[2]["total_spent"], item[0]
+
+    finalized = map(finalize, aggregated)
+    if n is not None:
+        return {cid: data for _, cid, data in heapq.nsmallest(n, finalized, key=rank)}
+
+    ranked = sorted(finalized, key=rank, reverse=True)
+    result = {}
+    while ranked:
+        _, cid, data = ranked.pop()
+        result[cid] = data
+    return result
+
+
+# =========================================================
+# PRODUCT ANALYSIS (OUT-OF-CORE)
+# =========================================================
+
+def _new_product():
+    return [0, 0.0]
+
+
+def _apply_product(state, kind, payload):
+    if kind == PARTIAL:
+        state[0], state[1] = payload
+        return 0
+
+    qty, revenue = payload
+    state[0] += qty
+    state[1] += revenue
+    return 0
+
+
+def _product_totals(transactions, memory_limit, num_partitions, spill_dir):
+    """
+    Yields: (first_index, product_name, [quantity, revenue]) per product
+    """
+    records = (
+        (tx["ProductName"], index, ROW, (tx["Quantity"], tx["Quantity"] * tx["UnitPrice"]))
+        for index, tx in enumerate(transactions)
+    )
+    return _aggregate(
+        records, _new_product, _apply_product, PRODUCT_ENTRY_BYTES,
+        memory_limit, num_partitions, spill_dir,
+    )
+
+
+def top_selling_products_external(transactions, n=5, memory_limit=DEFAULT_MEMORY_LIMIT,
+                                  num_partitions=DEFAULT_PARTITIONS, spill_dir=None):
+    """
+    Same result as top_selling_products(), computed within memory_limit
+    bytes of aggregation state by spilling hash partitions to disk
+    """
+    aggregated = _product_totals(transactions, memory_limit, num_partitions, spill_dir)
+    top = heapq.nsmallest(n, aggregated, key=lambda item: (-item[2][0], item[0]))
+    return [(name, qty, round(revenue, 2)) for _, name, (qty, revenue) in top]
+
+
+def low_performing_products_external(transactions, threshold=10, memory_limit=DEFAULT_MEMORY_LIMIT,
+                                     num_partitions=DEFAULT_PARTITIONS, spill_dir=None):
+    """
+    Same result as low_performing_products(), computed within memory_limit
+    bytes of aggregation state; only products below threshold are kept
+    """
+    aggregated = _product_totals(transactions, memory_limit, num_partitions, spill_dir)
+    low = [
+        (first_index, name, qty, revenue)
+        for first_index, name, (qty, revenue) in aggregated
+        if qty < threshold
+    ]
+    low.sort(key=lambda item: (item[2], item[0]))
+    return [(name, qty, round(revenue, 2)) for _, name, qty, revenue in low]
+
+
+# =========================================================
+# DAILY SALES TREND (OUT-OF-CORE)
+# =========================================================
+
+def _new_visit():
+    return None
+
+
+def _apply_visit(state, kind, payload):
+    return 0
+
+
+def daily_sales_trend_external(transactions, memory_limit=DEFAULT_MEMORY_LIMIT,
+                               num_partitions=DEFAULT_PARTITIONS, spill_dir=None):
+    """
+    Same result as daily_sales_trend(); revenue and counts are kept per
+    day, and the distinct (date, customer) pairs behind unique_customers
+    are found within memory_limit bytes by spilling hash partitions
+    """
+    daily = {}
+
+    def records():
+        for index, tx in enumerate(transactions):
+            date = tx["Date"]
+            entry = daily.get(date)
+            if entry is None:
+                entry = daily[date] = [0.0, 0, 0]
+            entry[0] += tx["Quantity"] * tx["UnitPrice"]
+            entry[1] += 1
+            yield (date, tx["CustomerID"]), index, ROW, None
+
+    visits = _aggregate(
+        records(), _new_visit, _apply_visit, VISIT_ENTRY_BYTES,
+        memory_limit, num_partitions, spill_dir,
+    )
+    for _, (date, _), _ in visits:
+        daily[date][2] += 1
+
+    result = {}
+    for date in sorted(daily.keys()):
+        revenue, transaction_count, unique_customers = daily[date]
+        result[date] = {
+            "revenue": round(revenue, 2),
+            "transaction_count": transaction_count,
+            "unique_customers": unique_customers
+        }
+
+    return result
+
+
+# =========================================================
+# CROSS-FILE DE-DUPLICATION (OUT-OF-CORE)
+# =========================================================
+
+def _new_positions():
+    return []
+
+
+def _apply_positions(state, kind, payload):
+    if kind == PARTIAL:
+        state[:] = payload
+        return POSITION_BYTES * len(state)
+
+    state.append(payload)
+    return POSITION_BYTES
+
+
+def duplicate_positions_external(transactions, memory_limit=DEFAULT_MEMORY_LIMIT,
+                                 num_partitions=DEFAULT_PARTITIONS, spill_dir=None):
+    """
+    Returns the positions of the rows that file_handler's TransactionID
+    de-duplication would drop: every repeat of a TransactionID among
+    valid rows, and separately among invalid rows
+
+    Only the repeats are kept in memory; the per-ID state is spilled
+    within memory_limit bytes.
+    """
+    records = (
+        ((is_valid_transaction(tx), tx["TransactionID"]), index, ROW, index)
+        for index, tx in enumerate(transactions)
+    )
+    aggregated = _aggregate(
+        records, _new_positions, _apply_positions, ID_ENTRY_BYTES,
+        memory_limit, num_partitions, spill_dir,
+    )
+    return {
+        position
+        for first_index, _, positions in aggregated
+        for position in positions
+        if position != first_index
+    }
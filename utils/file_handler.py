@@ -1,3 +1,24 @@
+import os
+from itertools import islice
+from operator import itemgetter
+
+from utils.data_processor import is_valid_transaction, parse_transactions
+
+# gzip, glob, tempfile and concurrent.futures are imported inside the
+# functions that need them: the CLI is launched many times a day for small
+# slices and module import time dominates those runs.
+
+
+def _open_text(filename, encoding):
+    if filename.endswith(".gz"):
+        import gzip
+        return gzip.open(filename, "rt", encoding=encoding)
+    return open(filename, "r", encoding=encoding)
+
+
+SALES_FILE_ENCODINGS = ["utf-8", "latin-1", "cp1252"]
+
+
 def read_sales_data(filename):
     """
     Reads sales data from file handling encoding issues
@@ -13,13 +34,12 @@ def read_sales_data(filename):
     - Handle FileNotFoundError with appropriate error message
     - Skip the header row
     - Remove empty lines
+    - Files ending in '.gz' are decompressed transparently
     """
 
-    encodings = ["utf-8", "latin-1", "cp1252"]
-
-    for encoding in encodings:
+    for encoding in SALES_FILE_ENCODINGS:
         try:
-            with open(filename, "r", encoding=encoding) as file:
+            with _open_text(filename, encoding) as file:
                 lines = file.readlines()
 
                 # Skip header row
@@ -40,3 +60,339 @@ def read_sales_data(filename):
 
     print("❌ Error: Unable to read file with supported encodings.")
     return []
+
+
+# =========================================================
+# MULTI-FILE INGESTION
+# =========================================================
+
+SALES_FILE_SUFFIXES = (".txt", ".txt.gz")
+GLOB_CHARACTERS = "*?["
+
+
+def expand_input_paths(inputs):
+    """
+    Expands files, directories and glob patterns into a sorted list of
+    sales files, without repeats
+
+    Directories contribute every '*.txt' / '*.txt.gz' file directly inside them.
+    """
+    import glob
+
+    paths = []
+    seen = set()
+
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(
+                os.path.join(item, name)
+                for name in os.listdir(item)
+                if name.endswith(SALES_FILE_SUFFIXES)
+            )
+        elif any(ch in item for ch in GLOB_CHARACTERS):
+            matches = sorted(path for path in glob.glob(item) if os.path.isfile(path))
+        else:
+            matches = [item]
+
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                paths.append(path)
+
+    return paths
+
+
+class TransactionIDSet:
+    """
+    Exact set of TransactionIDs seen so far
+
+    Canonical IDs ('T' followed by digits) are packed into a single int
+    (numeric value and digit count, so 'T018' and 'T18' stay distinct),
+    which takes roughly half the memory of the string. Other IDs fall
+    back to a plain string set.
+    """
+
+    def __init__(self):
+        self._packed = set()
+        self._other = set()
+
+    def add(self, transaction_id):
+        """
+        Adds transaction_id; returns False if it was already present
+        """
+        digits = transaction_id[1:]
+        if transaction_id[:1] == "T" and digits.isdigit() and digits.isascii() and len(digits) < 64:
+            key = (int(digits) << 6) | len(digits)
+            target = self._packed
+        else:
+            key = transaction_id
+            target = self._other
+
+        if key in target:
+            return False
+        target.add(key)
+        return True
+
+    def __len__(self):
+        return len(self._packed) + len(self._other)
+
+
+def _read_and_parse(filename):
+    raw_lines = read_sales_data(filename)
+    return len(raw_lines), parse_transactions(raw_lines)
+
+
+STREAM_BATCH_LINES = 10000
+
+
+def _detect_encoding(filename):
+    """
+    Returns the first supported encoding that decodes the whole file, or
+    None; reads in chunks so the file is never held in memory
+    """
+    for encoding in SALES_FILE_ENCODINGS:
+        try:
+            with _open_text(filename, encoding) as file:
+                while file.read(1 << 20):
+                    pass
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def _iter_parsed_batches(filename, batch_lines=STREAM_BATCH_LINES):
+    """
+    Streaming counterpart of _read_and_parse(): yields (line_count, parsed)
+    for every batch_lines lines of one file, with the same header, blank
+    line and encoding handling as read_sales_data()
+    """
+    try:
+        encoding = _detect_encoding(filename)
+    except FileNotFoundError:
+        print(f"❌ Error: File '{filename}' not found.")
+        return
+
+    if encoding is None:
+        print("❌ Error: Unable to read file with supported encodings.")
+        return
+
+    with _open_text(filename, encoding) as file:
+        # Skip header row
+        next(file, None)
+
+        while True:
+            lines = list(islice(file, batch_lines))
+            if not lines:
+                return
+            raw_lines = [line.strip() for line in lines if line.strip()]
+            yield len(raw_lines), parse_transactions(raw_lines)
+
+
+def _combine(paths, results, summary, drop_positions=None):
+    """
+    Yields the rows of per-file (line_count, parsed) results in path
+    order, keeping the first valid occurrence of each TransactionID (and
+    the first invalid one, so overlapping files do not inflate the
+    invalid count); fills summary once the results are exhausted
+
+    drop_positions, if given, replaces the TransactionID sets: a
+    collection of positions (counted over all parsed rows) to drop.
+    """
+    seen_ids = TransactionIDSet()
+    seen_invalid_ids = TransactionIDSet()
+    raw_count = 0
+    parsed_count = 0
+    duplicates = 0
+    final_count = 0
+
+    # Files are combined in path order so the kept duplicate is deterministic
+    for line_count, parsed in results:
+        raw_count += line_count
+
+        for position, tx in enumerate(parsed, start=parsed_count):
+            if drop_positions is not None:
+                duplicate = position in drop_positions
+            else:
+                # Invalid rows keep their IDs in a separate set: an invalid row
+                # must not knock out a valid row with the same ID from a later
+                # file. The first copy of an invalid row is kept so that
+                # validate_and_filter() counts it once.
+                ids = seen_ids if is_valid_transaction(tx) else seen_invalid_ids
+                duplicate = not ids.add(tx["TransactionID"])
+
+            if duplicate:
+                duplicates += 1
+                continue
+            final_count += 1
+            yield tx
+
+        parsed_count += len(parsed)
+
+    summary.update({
+        "files": len(paths),
+        "raw_lines": raw_count,
+        "parsed": parsed_count,
+        "duplicates": duplicates,
+        "final_count": final_count,
+    })
+
+
+def read_sales_files(inputs, workers=None):
+    """
+    Reads and parses many sales files (paths, directories or globs,
+    optionally gzip-compressed) in parallel worker processes and combines
+    them, keeping the first valid occurrence of each TransactionID (and
+    the first invalid one, so overlapping files do not inflate the
+    invalid count)
+
+    Returns: (transactions, summary)
+    """
+    paths = expand_input_paths(inputs)
+    workers = workers or os.cpu_count() or 1
+
+    if workers > 1 and len(paths) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            chunksize = max(1, len(paths) // (workers * 4))
+            results = list(pool.map(_read_and_parse, paths, chunksize=chunksize))
+    else:
+        results = [_read_and_parse(path) for path in paths]
+
+    summary = {}
+    transactions = list(_combine(paths, results, summary))
+    return transactions, summary
+
+
+def iter_sales_files(inputs, summary=None, drop_positions=None):
+    """
+    Streaming counterpart of read_sales_files(): reads the files one after
+    another in batches of STREAM_BATCH_LINES lines and yields the
+    combined, de-duplicated rows
+
+    Only one batch of rows is held at a time, plus the TransactionID sets
+    used for de-duplication, which grow by about 100 bytes per row. To
+    avoid them, find the duplicates once with
+    external_aggregation.duplicate_positions_external() over
+    iter_sales_files(inputs, drop_positions=()) and pass the result as
+    drop_positions. Pass a dict as summary to receive the
+    read_sales_files() summary when the stream is exhausted.
+    """
+    paths = expand_input_paths(inputs)
+    results = (batch for path in paths for batch in _iter_parsed_batches(path))
+    return _combine(paths, results, {} if summary is None else summary, drop_positions)
+
+
+# =========================================================
+# BUFFERED, ATOMIC OUTPUT
+# =========================================================
+
+WRITE_BUFFER_SIZE = 1 << 20
+WRITE_BATCH_ROWS = 5000
+
+COMPRESSION_SUFFIXES = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+
+def compressed_filename(filename, compression=None):
+    """
+    Appends the compression suffix to filename if it is missing
+    """
+    if compression is None:
+        return filename
+
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    suffix = COMPRESSION_SUFFIXES[compression]
+    return filename if filename.endswith(suffix) else filename + suffix
+
+
+def _open_compressed(raw, compression):
+    if compression is None:
+        return raw
+
+    if compression == "gzip":
+        import gzip
+        return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def write_records(filename, columns, records, delimiter="|", compression=None,
+                  batch_size=WRITE_BATCH_ROWS):
+    """
+    Writes dictionaries as delimited rows, atomically
+
+    Rows go into a temporary file in the target directory, which is
+    fsynced and then renamed over filename, so a crash mid-write leaves
+    the previous file untouched. Encoding is batched, but per-row string
+    formatting still dominates; expect throughput close to a plain
+    write loop.
+
+    Returns: number of records written
+    """
+    import tempfile
+
+    template = delimiter.join(["%s"] * len(columns))
+    fields = itemgetter(*columns)
+    header = delimiter.join(columns) + "\n"
+
+    def encode(record):
+        try:
+            return template % fields(record)
+        except KeyError:
+            return delimiter.join(str(record.get(col, "")) for col in columns)
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=".tmp-", suffix=os.path.basename(filename)
+    )
+    written = 0
+
+    try:
+        with os.fdopen(fd, "wb", buffering=WRITE_BUFFER_SIZE) as raw:
+            stream = _open_compressed(raw, compression)
+            stream.write(header.encode("utf-8"))
+
+            iterator = iter(records)
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+                chunk = "\n".join([encode(record) for record in batch]) + "\n"
+                stream.write(chunk.encode("utf-8"))
+                written += len(batch)
+
+            if stream is not raw:
+                stream.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+
+        # mkstemp creates 0600 files; keep the permissions of the file we
+        # replace, or give a new file what open(filename, "w") would
+        if os.path.exists(filename):
+            mode = os.stat(filename).st_mode & 0o777
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, filename)
+
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return written
@@ -12,32 +12,64 @@ from utils.data_processor import (
 )
 
 
-def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt"):
+def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt",
+                          memory_limit=None, spill_dir=None):
     """
     Generates a comprehensive formatted text report
+
+    transactions is a list, or a zero-argument callable that returns a
+    fresh iterable of rows; with a callable every aggregate makes its own
+    pass and the rows are never held together. enriched_transactions is
+    any iterable (consumed once); pass None for offline runs that skipped
+    API enrichment, and the enrichment section then says so. With
+    memory_limit (bytes) set, customer, product and daily aggregates use
+    the out-of-core aggregation in utils.external_aggregation.
     """
+    rows = transactions if callable(transactions) else lambda: transactions
 
     # =============================
     # BASIC METRICS
     # =============================
-    total_transactions = len(transactions)
-    total_revenue = calculate_total_revenue(transactions)
+    total_revenue = calculate_total_revenue(rows())
+    region_stats = region_wise_sales(rows())
+    total_transactions = sum(data["transaction_count"] for data in region_stats.values())
     avg_order_value = total_revenue / total_transactions if total_transactions else 0
 
-    dates = [tx["Date"] for tx in transactions]
-    date_range = f"{min(dates)} to {max(dates)}" if dates else "N/A"
-
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     # =============================
     # ANALYTICS
     # =============================
-    region_stats = region_wise_sales(transactions)
-    top_products = top_selling_products(transactions, n=5)
-    customers = customer_analysis(transactions)
-    daily_trend = daily_sales_trend(transactions)
-    peak_day, peak_revenue, peak_txn_count = find_peak_sales_day(transactions)
-    low_products = low_performing_products(transactions)
+    if memory_limit is None:
+        top_products = top_selling_products(rows(), n=5)
+        customers = customer_analysis(rows())
+        low_products = low_performing_products(rows())
+        daily_trend = daily_sales_trend(rows())
+    else:
+        from utils.external_aggregation import (
+            customer_analysis_external,
+            daily_sales_trend_external,
+            low_performing_products_external,
+            top_selling_products_external,
+        )
+
+        top_products = top_selling_products_external(
+            rows(), n=5, memory_limit=memory_limit, spill_dir=spill_dir
+        )
+        customers = customer_analysis_external(
+            rows(), memory_limit=memory_limit, n=5, spill_dir=spill_dir
+        )
+        low_products = low_performing_products_external(
+            rows(), memory_limit=memory_limit, spill_dir=spill_dir
+        )
+        daily_trend = daily_sales_trend_external(
+            rows(), memory_limit=memory_limit, spill_dir=spill_dir
+        )
+    peak_day, peak_revenue, peak_txn_count = find_peak_sales_day(rows())
+
+    # Trend dates are sorted, so the first and last are the date range
+    dates = list(daily_trend)
+    date_range = f"{dates[0]} to {dates[-1]}" if dates else "N/A"
 
     # Avg transaction value per region
     region_avg_value = {}
@@ -47,17 +79,20 @@ def generate_sales_report(transactions, enriched_transactions, output_file="outp
     # =============================
     # API ENRICHMENT SUMMARY
     # =============================
-    enriched_success = [tx for tx in enriched_transactions if tx.get("API_Match")]
-    enriched_failed = [tx for tx in enriched_transactions if not tx.get("API_Match")]
+    enrichment_skipped = enriched_transactions is None
+    enriched_count = 0
+    success_count = 0
+    failed_products = set()
 
-    success_rate = (
-        (len(enriched_success) / len(enriched_transactions)) * 100
-        if enriched_transactions else 0
-    )
+    for tx in enriched_transactions or []:
+        enriched_count += 1
+        if tx.get("API_Match"):
+            success_count += 1
+        else:
+            failed_products.add(tx["ProductName"])
 
-    failed_products = sorted(
-        set(tx["ProductName"] for tx in enriched_failed)
-    )
+    success_rate = (success_count / enriched_count) * 100 if enriched_count else 0
+    failed_products = sorted(failed_products)
 
     # =============================
     # WRITE REPORT
@@ -149,15 +184,93 @@ def generate_sales_report(transactions, enriched_transactions, output_file="outp
         # 8. API ENRICHMENT SUMMARY
         f.write("API ENRICHMENT SUMMARY\n")
         f.write("-" * 60 + "\n")
-        f.write(f"Total Transactions Enriched: {len(enriched_transactions)}\n")
-        f.write(f"Successful Enrichments:      {len(enriched_success)}\n")
-        f.write(f"Success Rate:                {success_rate:.2f}%\n\n")
-
-        f.write("Products Not Enriched:\n")
-        if failed_products:
-            for p in failed_products:
-                f.write(f" - {p}\n")
+        if enrichment_skipped:
+            f.write("Skipped (offline run)\n")
         else:
-            f.write(" - None\n")
+            f.write(f"Total Transactions Enriched: {enriched_count}\n")
+            f.write(f"Successful Enrichments:      {success_count}\n")
+            f.write(f"Success Rate:                {success_rate:.2f}%\n\n")
+
+            f.write("Products Not Enriched:\n")
+            if failed_products:
+                for p in failed_products:
+                    f.write(f" - {p}\n")
+            else:
+                f.write(" - None\n")
 
     print(f"✅ Sales report generated successfully at: {output_file}")
+
+
+def generate_approximate_report(approx_results, output_file="output/sales_report.txt"):
+    """
+    Generates a text report from approximate_analysis() estimates,
+    labelling every figure with its confidence interval or error bound
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    confidence = approx_results["confidence"] * 100
+    ci_label = f"{confidence:.0f}% CI"
+    revenue = approx_results["total_revenue"]
+
+    with open(output_file, "w", encoding="utf-8") as f:
+
+        # 1. HEADER
+        f.write("=" * 60 + "\n")
+        f.write("      SALES ANALYTICS REPORT (APPROXIMATE)\n")
+        f.write(f"     Generated: {now}\n")
+        f.write(f"     Records Processed: {approx_results['transaction_count']}\n")
+        f.write(f"     Confidence Level: {confidence:.0f}%\n")
+        f.write("=" * 60 + "\n\n")
+
+        # 2. OVERALL SUMMARY
+        f.write("OVERALL SUMMARY (ESTIMATED)\n")
+        f.write("-" * 60 + "\n")
+        f.write(f"Total Revenue:        ₹{revenue['estimate']:,.2f}\n")
+        f.write(f"{ci_label + ':':<22}₹{revenue['ci_low']:,.2f} - ₹{revenue['ci_high']:,.2f}\n")
+        f.write(f"Sample Size:          {approx_results['sample_size']}\n\n")
+
+        # 3. REGION-WISE PERFORMANCE
+        f.write("REGION-WISE PERFORMANCE (ESTIMATED)\n")
+        f.write("-" * 60 + "\n")
+        f.write(f"{'Region':<10}{'Sales':>15}{'% of Total':>12}{ci_label + ' (%)':>20}\n")
+
+        for region, data in approx_results["region_sales"].items():
+            low, high = data["percentage_ci"]
+            interval = f"{low:.2f} - {high:.2f}"
+            f.write(
+                f"{region:<10}"
+                f"₹{data['total_sales']:>14,.2f}"
+                f"{data['percentage']:>11.2f}%"
+                f"{interval:>20}\n"
+            )
+        f.write("\n")
+
+        # 4. TOP 5 PRODUCTS
+        f.write("TOP 5 PRODUCTS (ESTIMATED)\n")
+        f.write("-" * 60 + "\n")
+        f.write(f"{'Rank':<6}{'Product Name':<25}{'Qty Sold':>10}{ci_label:>19}\n")
+
+        for idx, (name, qty, low, high) in enumerate(approx_results["top_products"], start=1):
+            interval = f"{low} - {high}"
+            f.write(f"{idx:<6}{name:<25}{qty:>10}{interval:>19}\n")
+        f.write("\n")
+
+        # 5. TOP 5 CUSTOMERS
+        f.write("TOP 5 CUSTOMERS (ESTIMATED)\n")
+        f.write("-" * 60 + "\n")
+        f.write(f"{'Rank':<6}{'Customer ID':<15}{'Total Spent':>15}  {ci_label}\n")
+
+        for idx, (cid, spent, low, high) in enumerate(approx_results["top_customers"], start=1):
+            interval = f"₹{low:,.2f} - ₹{high:,.2f}"
+            f.write(f"{idx:<6}{cid:<15}₹{spent:>14,.2f}  {interval}\n")
+        f.write("\n")
+
+        # 6. DAILY UNIQUE CUSTOMERS
+        f.write("DAILY UNIQUE CUSTOMERS (ESTIMATED)\n")
+        f.write("-" * 60 + "\n")
+        f.write(f"{'Date':<12}{'Customers':>12}{ci_label:>20}\n")
+
+        for date, data in approx_results["daily_unique_customers"].items():
+            interval = f"{data['ci_low']} - {data['ci_high']}"
+            f.write(f"{date:<12}{data['unique_customers']:>12}{interval:>20}\n")
+
+    print(f"✅ Approximate sales report generated successfully at: {output_file}")